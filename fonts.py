@@ -0,0 +1,20 @@
+# fonts.py — shared font loading for the ST7735 scripts
+
+import functools, warnings
+from PIL import ImageFont
+
+# Monospace first: it keeps the digits steady
+FONT_CANDIDATES = ("/usr/share/fonts/truetype/dejavu/DejaVuSansMono.ttf",
+                   "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf")
+
+@functools.lru_cache(maxsize=None)
+def load_font(size):
+    # Cached so each face/size is opened by FreeType once per process
+    for path in FONT_CANDIDATES:
+        try:
+            return ImageFont.truetype(path, size)
+        except OSError:
+            pass
+    warnings.warn(f"none of {FONT_CANDIDATES} could be loaded; "
+                  f"falling back to PIL's default bitmap font")
+    return ImageFont.load_default()
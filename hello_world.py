@@ -1,6 +1,7 @@
 import time
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
 import st7735
+from fonts import load_font
 
 disp = st7735.ST7735(
     port=0,
@@ -11,18 +12,19 @@ disp = st7735.ST7735(
     width=160, height=80,     # this 0.96" panel
     offset_left=26, offset_top=1,  # common offsets; adjust if needed
     bgr=True,                 # correct colour order on most batches
-    spi_speed_hz=4_000_000
+    spi_speed_hz=24_000_000   # drop to 20 MHz if you see artifacts
 )
 disp.begin()
 
+# Same persistent buffer + shared font cache as stopwatch.py
 W, H = disp.width, disp.height
-img = Image.new("RGB", (W, H), (0, 0, 0))
-d = ImageDraw.Draw(img)
-font = ImageFont.load_default()
+img  = Image.new("RGB", (W, H), (0, 0, 0))
+draw = ImageDraw.Draw(img)
+font = load_font(18)
 txt = "Hello!"
-bbox = d.textbbox((0,0), txt, font=font)
+bbox = draw.textbbox((0,0), txt, font=font)
 tw, th = bbox[2]-bbox[0], bbox[3]-bbox[1]
-d.rectangle((0,0,W-1,H-1), outline=(0,255,0))
-d.text(((W-tw)//2, (H-th)//2), txt, font=font, fill=(255,255,255))
+draw.rectangle((0,0,W-1,H-1), outline=(0,255,0))  # shows whether the panel offsets are right
+draw.text(((W-tw)//2, (H-th)//2), txt, font=font, fill=(255,255,255))
 disp.display(img)
 time.sleep(5)
@@ -1,76 +1,226 @@
 # stopwatch.py — ST7735 stopwatch (shapes.py-style drawing)
 # SPACE/Enter = Lap+Reset | c = Clear last | b = Clear best | q = Quit
 
-import sys, time, termios, tty, select, signal
-from PIL import Image, ImageDraw, ImageFont
+import os, sys, time, termios, tty, queue, threading, selectors
+import numpy as np
+from PIL import Image, ImageDraw
 import st7735  # Pimoroni driver from GitHub
+from fonts import load_font
+
+try:
+    from numba import njit  # optional: JIT-compiles the RGB565 pack loop
+except ImportError:
+    njit = None
 
 # --- Display init: exactly like shapes.py style ---
+ROTATION = 90
 disp = st7735.ST7735(
     port=0,
     cs=0,           # CE0 (pin 24). Use 1 ONLY if you wired CE1 (pin 26)
     dc=9,           # BCM9 (pin 21)
     backlight=18,   # BCM18 (pin 12) - omit if not wired
-    rotation=90,
-    spi_speed_hz=4_000_000
+    rotation=ROTATION,
+    spi_speed_hz=24_000_000  # drop to 20 MHz if you see artifacts
 )
 disp.begin()
 
-# Match shapes.py: derive size from the driver; one persistent buffer
+# Match shapes.py: derive size from the driver. Two persistent buffers:
+# render() draws into one while the SPI thread is still sending the other
 WIDTH, HEIGHT = disp.width, disp.height
-img  = Image.new("RGB", (WIDTH, HEIGHT), (0, 0, 0))
-draw = ImageDraw.Draw(img)
-
-def load_font(size):
-    # Monospace helps the digits look steady; fallback if not present
-    for path in ("/usr/share/fonts/truetype/dejavu/DejaVuSansMono.ttf",
-                 "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"):
-        try:
-            return ImageFont.truetype(path, size)
-        except Exception:
-            pass
-    return ImageFont.load_default()
+free_frames = queue.Queue()
+for _ in range(2):
+    frame = Image.new("RGB", (WIDTH, HEIGHT), (0, 0, 0))
+    free_frames.put((frame, ImageDraw.Draw(frame)))
+ruler = ImageDraw.Draw(Image.new("RGB", (1, 1)))  # text measurement only, never sent
 
 FONT_BIG   = load_font(34)  # main stopwatch (bigger)
 FONT_MED   = load_font(18)  # Last (green, sits between clock and hints)
 FONT_SMALL = load_font(12)  # Best + hints
 
-def fmt_time(t):
-    m, s = divmod(max(0.0, t), 60)
-    return f"{int(m):02d}:{s:06.3f}"
+def fmt_time(ns):
+    # Times are integer nanoseconds (time.monotonic_ns); no float math per frame
+    ms = max(0, ns) // 1_000_000
+    m, ms = divmod(ms, 60_000)
+    s, ms = divmod(ms, 1000)
+    return f"{m:02d}:{s:02d}.{ms:03d}"
 
 def text_size(txt, font):
-    x0, y0, x1, y1 = draw.textbbox((0, 0), txt, font=font)
+    x0, y0, x1, y1 = ruler.textbbox((0, 0), txt, font=font)
     return (x1 - x0), (y1 - y0)
 
-def render(current_s, last_s, best_s):
+def prerender(txt, font, fill):
+    # Rasterize a fixed label once; render() just pastes the pixels
+    _, _, x1, y1 = ruler.textbbox((0, 0), txt, font=font)
+    label = Image.new("RGB", (x1, y1), (0, 0, 0))
+    ImageDraw.Draw(label).text((0, 0), txt, font=font, fill=fill)
+    return label
+
+# --- Static labels: content and font never change, so render them once ---
+BEST_PREFIX   = "Best: "
+BEST_IMG      = prerender(BEST_PREFIX, FONT_SMALL, (0, 200, 255))
+BEST_VALUE_X  = 2 + int(ruler.textlength(BEST_PREFIX, font=FONT_SMALL))
+
+HINT          = "SPACE/Enter=Lap  c=Clear last  b=Clear best  q=Quit"
+HINT_IMG      = prerender(HINT, FONT_SMALL, (140, 140, 140))
+HINT_W, HINT_H = text_size(HINT, FONT_SMALL)
+HINT_POS      = ((WIDTH - HINT_W)//2, HEIGHT - HINT_H - 2)
+
+# --- Fixed layout for the clock + Last lines ---
+# Measured on a sample string so the rows they occupy never move between frames
+CLOCK_SAMPLE  = fmt_time(0)
+CUR_H         = text_size(CLOCK_SAMPLE, FONT_BIG)[1]
+CUR_Y         = (HEIGHT - CUR_H) // 2 - 8   # nudge up a little to make room for Last below
+LAST_Y        = CUR_Y + CUR_H + 2           # just below the big digits
+
+# --- Big clock glyphs: only 0-9 : . ever appear, so rasterize each once ---
+def glyph_mask(c):
+    _, _, x1, y1 = ruler.textbbox((0, 0), c, font=FONT_BIG)
+    mask = Image.new("L", (x1, y1), 0)
+    ImageDraw.Draw(mask).text((0, 0), c, font=FONT_BIG, fill=255)
+    return mask
+
+GLYPHS = {c: (glyph_mask(c), ruler.textlength(c, font=FONT_BIG)) for c in "0123456789:."}
+
+# Rows the big clock can ink; only these change between ticks (Best/Last/hints
+# change on key events, which re-send the whole frame)
+_, _top, _, _bottom = ruler.textbbox((0, CUR_Y), "0123456789:.", font=FONT_BIG)
+DIGITS_ROWS   = (max(0, _top), min(HEIGHT - 1, _bottom))
+
+def panel_window(x0, y0, x1, y1):
+    # Map an inclusive rect in our rotated frame onto the panel's own
+    # address space (the driver rotates with numpy.rot90 before sending)
+    k = (ROTATION // 90) % 4
+    if k == 0:
+        return x0, y0, x1, y1
+    if k == 1:
+        return y0, WIDTH - 1 - x1, y1, WIDTH - 1 - x0
+    if k == 2:
+        return WIDTH - 1 - x1, HEIGHT - 1 - y1, WIDTH - 1 - x0, HEIGHT - 1 - y0
+    return HEIGHT - 1 - y1, x0, HEIGHT - 1 - y0, x1
+
+# One wire-format (big-endian RGB565) buffer for the whole panel, reused by every push
+FRAMEBUF = bytearray(WIDTH * HEIGHT * 2)
+FRAME565 = np.frombuffer(FRAMEBUF, dtype=">u2")
+FRAMEU8  = np.frombuffer(FRAMEBUF, dtype=np.uint8)
+
+if njit is not None:
+    @njit(cache=True)
+    def pack_kernel(src, dst):
+        # One pass, no temporaries: writes the high byte then the low byte of
+        # each pixel, so the output is big-endian whatever the host order
+        h, w, _ = src.shape
+        for y in range(h):
+            for x in range(w):
+                v = ((src[y, x, 0] & 0xF8) << 8) | ((src[y, x, 1] & 0xFC) << 3) | (src[y, x, 2] >> 3)
+                dst[y, 2 * x] = v >> 8
+                dst[y, 2 * x + 1] = v & 0xFF
+else:
+    pack_kernel = None
+
+def pack_rgb565(image):
+    # Same packing as the driver's image_to_data(), written into FRAMEBUF
+    # instead of a per-byte Python list; returns the number of bytes used
+    px = np.rot90(np.asarray(image), ROTATION // 90)
+    h, w = px.shape[:2]
+    if pack_kernel is not None:
+        pack_kernel(px, FRAMEU8[:h * w * 2].reshape(h, w * 2))
+    else:
+        r = px[..., 0].astype(np.uint16)
+        g = px[..., 1].astype(np.uint16)
+        b = px[..., 2].astype(np.uint16)
+        FRAME565[:h * w].reshape(h, w)[:] = ((r & 0xF8) << 8) | ((g & 0xFC) << 3) | (b >> 3)
+    return h * w * 2
+
+# Warm up the JIT (or the NumPy path) now, so the first real frame is not slow
+pack_rgb565(Image.new("RGB", (WIDTH, HEIGHT), (0, 0, 0)))
+
+def send_pixels(nbytes):
+    # The first byte goes through data() so the driver raises DC (an empty
+    # write would make spidev raise); DC then stays high while the rest goes
+    # out in one writebytes2() call (spidev chunks it)
+    disp.data(FRAMEBUF[0])
+    disp._spi.writebytes2(memoryview(FRAMEBUF)[1:nbytes])
+
+def push_rows(img, y0, y1):
+    # Send only rows y0..y1 (inclusive) of img; the rest of the panel keeps its pixels
+    disp.set_window(*panel_window(0, y0, WIDTH - 1, y1))
+    send_pixels(pack_rgb565(img.crop((0, y0, WIDTH, y1 + 1))))
+
+# --- SPI thread: owns the bus and FRAMEBUF ---
+# Frames are handed over with the queue, so a buffer is only ever touched by
+# one thread at a time; it goes back to free_frames once it has been sent.
+spi_queue = queue.Queue(maxsize=1)
+spi_error = None  # set if a push fails; spi_wait() re-raises it in the main thread
+
+def spi_writer():
+    global spi_error
+    while True:
+        job = spi_queue.get()
+        if job is None:
+            return
+        frame, rows = job
+        try:
+            push_rows(frame[0], *rows)
+        except BaseException as e:
+            spi_error = e
+            return
+        finally:
+            free_frames.put(frame)
+
+spi_thread = threading.Thread(target=spi_writer, daemon=True)
+spi_thread.start()
+
+def spi_wait(op, *args):
+    # Bounded waits on the SPI queues: once the SPI thread is gone nothing will
+    # drain spi_queue or refill free_frames, so raise instead of hanging
+    while True:
+        if not spi_thread.is_alive():
+            raise RuntimeError("SPI thread stopped") from spi_error
+        try:
+            return op(*args, timeout=0.1)
+        except (queue.Empty, queue.Full):
+            pass
+
+last_state = None  # (clock text, last, best) currently on the panel
+
+def render(current_ns, last_ns, best_ns, full=False):
+    global last_state
+    cur = fmt_time(current_ns)
+    if (cur, last_ns, best_ns) == last_state:
+        return  # nothing visible would change; skip the draw and the SPI push
+    last_state = (cur, last_ns, best_ns)
+
+    # Waits only if both buffers are still queued/in flight
+    frame = spi_wait(free_frames.get)
+    img, draw = frame
+
     # Clear buffer
     draw.rectangle((0, 0, WIDTH, HEIGHT), fill=(0, 0, 0))
 
+    # --- Hints (bottom, small) ---
+    # Pasted first: the label is opaque, so anything drawn later stays on top
+    img.paste(HINT_IMG, HINT_POS)
+
     # --- Best (top-left, small) ---
-    best_txt = "--" if best_s is None else fmt_time(best_s)
-    draw.text((2, 2), f"Best: {best_txt}", font=FONT_SMALL, fill=(0, 200, 255))
+    best_txt = "--" if best_ns is None else fmt_time(best_ns)
+    img.paste(BEST_IMG, (2, 2))
+    draw.text((BEST_VALUE_X, 2), best_txt, font=FONT_SMALL, fill=(0, 200, 255))
 
     # --- Main clock (center) ---
-    cur = fmt_time(current_s)
-    tw, th = text_size(cur, FONT_BIG)
-    cur_y = (HEIGHT - th) // 2 - 8   # nudge up a little to make room for Last below
-    draw.text(((WIDTH - tw)//2, cur_y), cur, font=FONT_BIG, fill=(255, 255, 255))
+    # Blit cached glyphs instead of laying out the string with FreeType
+    x = (WIDTH - sum(GLYPHS[c][1] for c in cur)) / 2
+    for c in cur:
+        mask, advance = GLYPHS[c]
+        img.paste((255, 255, 255), (int(x), CUR_Y), mask)
+        x += advance
 
     # --- Last (green, centered under the big clock) ---
-    last_txt = "--" if last_s is None else fmt_time(last_s)
-    ltw, lth = text_size(last_txt, FONT_MED)
-    # place it just below the big digits, centered
-    last_y = cur_y + th + 2
-    draw.text(((WIDTH - ltw)//2, last_y), last_txt, font=FONT_MED, fill=(0, 255, 128))
+    last_txt = "--" if last_ns is None else fmt_time(last_ns)
+    ltw, _ = text_size(last_txt, FONT_MED)
+    draw.text(((WIDTH - ltw)//2, LAST_Y), last_txt, font=FONT_MED, fill=(0, 255, 128))
 
-    # --- Hints (bottom, small) ---
-    hint = "SPACE/Enter=Lap  c=Clear last  b=Clear best  q=Quit"
-    hw, hh = text_size(hint, FONT_SMALL)
-    draw.text(((WIDTH - hw)//2, HEIGHT - hh - 2), hint, font=FONT_SMALL, fill=(140, 140, 140))
-
-    # Push the buffer
-    disp.display(img)
+    # Queue the buffer: whole frame after a key event, otherwise just the digit rows
+    spi_wait(spi_queue.put, (frame, (0, HEIGHT - 1) if full else DIGITS_ROWS))
 
 # --- Non-blocking keyboard (USB keyboard or foot switch) ---
 TRIG  = {b' ', b'\n', b'\r'}  # SPACE / Enter
@@ -78,39 +228,45 @@ CLEAR_LAST = {b'c', b'C'}
 CLEAR_BEST = {b'b', b'B'}
 QUIT  = {b'q', b'Q'}
 
+STDIN = sys.stdin.fileno()
+
 class RawIn:
     def __enter__(self):
-        self.fd = sys.stdin.fileno()
-        self.old = termios.tcgetattr(self.fd)
-        tty.setcbreak(self.fd)
+        self.old = termios.tcgetattr(STDIN)
+        tty.setcbreak(STDIN)
         return self
     def __exit__(self, *_):
-        termios.tcsetattr(self.fd, termios.TCSADRAIN, self.old)
+        termios.tcsetattr(STDIN, termios.TCSADRAIN, self.old)
 
-def read_key(timeout=0.0):
-    if sys.stdin in select.select([sys.stdin], [], [], timeout)[0]:
-        return sys.stdin.buffer.read(1)
-    return None
+def read_key():
+    # Only called once the selector reports stdin readable, so this never blocks.
+    # One byte per call so keys typed within the same tick are all handled
+    return os.read(STDIN, 1) or None
 
 # --- Main loop ---
-running  = True
-signal.signal(signal.SIGINT, lambda *_: sys.exit(0))
+FRAME_NS  = 100_000_000  # tick period (10 fps)
 
-start     = time.monotonic()
+start     = time.monotonic_ns()
 last_lap  = None
 best_lap  = None
-last_draw = 0.0
+next_draw = start + FRAME_NS
+
+# One epoll wait per wakeup: returns on a key press or when the next tick is due
+keys = selectors.DefaultSelector()
+keys.register(STDIN, selectors.EVENT_READ)
 
 # First frame
-render(0.0, last_lap, best_lap)
+render(0, last_lap, best_lap, full=True)
 
 try:
     with RawIn():
         while True:
-            now = time.monotonic()
+            ready = keys.select(max(0, next_draw - time.monotonic_ns()) / 1e9)
+            now = time.monotonic_ns()
             elapsed = now - start
 
-            ch = read_key(0.01)
+            # Level-triggered: any further buffered keys wake the next select()
+            ch = read_key() if ready else None
             if ch:
                 if ch in QUIT:
                     break
@@ -119,22 +275,30 @@ try:
                     last_lap = elapsed
                     if best_lap is None or last_lap < best_lap:
                         best_lap = last_lap
-                    start = time.monotonic()
-                    render(0.0, last_lap, best_lap)
+                    start = time.monotonic_ns()
+                    render(0, last_lap, best_lap, full=True)
                     continue
                 if ch in CLEAR_LAST:
                     last_lap = None
-                    render(elapsed, last_lap, best_lap)
+                    render(elapsed, last_lap, best_lap, full=True)
                     continue
                 if ch in CLEAR_BEST:
                     best_lap = None
-                    render(elapsed, last_lap, best_lap)
+                    render(elapsed, last_lap, best_lap, full=True)
                     continue
 
             # Gentle ~10 fps refresh
-            if now - last_draw >= 0.1:
+            if now >= next_draw:
                 render(elapsed, last_lap, best_lap)
-                last_draw = now
+                next_draw = now + FRAME_NS
+except KeyboardInterrupt:
+    pass  # Ctrl-C: same as q
 finally:
-    draw.rectangle((0, 0, WIDTH, HEIGHT), fill=(0, 0, 0))
-    disp.display(img)
+    # If the SPI thread already died the panel can't be cleared; its error is
+    # what spi_wait() raised out of render()
+    if spi_thread.is_alive():
+        frame = spi_wait(free_frames.get)
+        frame[1].rectangle((0, 0, WIDTH, HEIGHT), fill=(0, 0, 0))
+        spi_wait(spi_queue.put, (frame, (0, HEIGHT - 1)))
+        spi_wait(spi_queue.put, None)  # SPI thread exits after sending the blank frame
+        spi_thread.join()